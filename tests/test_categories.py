@@ -0,0 +1,179 @@
+import http.server
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import urllib.parse
+from typing import Any, ClassVar, Dict, List, Optional, Tuple
+from unittest import mock
+
+import diskcache  # type: ignore[import-untyped]
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transform_images import ImageModelTransformer
+
+
+class FakeApiHandler(http.server.BaseHTTPRequestHandler):
+    """Serves the WordPress category and Odoo filter endpoints."""
+
+    # WordPress id -> category name, Odoo name -> mattaId
+    wordpress: ClassVar[Dict[int, str]] = {}
+    odoo: ClassVar[Dict[str, int]] = {}
+    # Status returned by each endpoint, e.g. 503 for an outage
+    wordpress_status: ClassVar[int] = 200
+    odoo_status: ClassVar[int] = 200
+    # Paths of the requests served, in order
+    requests: ClassVar[List[str]] = []
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        url = urllib.parse.urlparse(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        self.requests.append(url.path)
+
+        if url.path.endswith('/products/categories'):
+            if self.wordpress_status != 200:
+                return self.send_json(self.wordpress_status, {})
+            ids = [int(i) for i in query['include'][0].split(',')
+                   if i.isascii() and i.isdigit()]
+            return self.send_json(200, [
+                {'id': i, 'name': self.wordpress[i]}
+                for i in ids if i in self.wordpress
+            ])
+
+        if self.odoo_status != 200:
+            return self.send_json(self.odoo_status, {})
+        name = query['Name'][0]
+        data = [{'mattaId': self.odoo[name]}] if name in self.odoo else []
+        self.send_json(200, {'status': 'success', 'data': data})
+
+    def send_json(self, status: int, body: Any) -> None:
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class CategoryConversionTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+
+        class Handler(FakeApiHandler):
+            wordpress = {7: 'Shoes', 8: 'Bags'}
+            odoo = {'Shoes': 501}
+            requests: ClassVar[List[str]] = []
+
+        self.handler = Handler
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever,
+                         kwargs={'poll_interval': 0.05},
+                         daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def make_transformer(self, **kwargs: Any) -> ImageModelTransformer:
+        transformer = ImageModelTransformer(fetch_dimensions=False, **kwargs)
+        self.addCleanup(transformer.close)
+        transformer.wordpress_base_url = self.base_url
+        transformer.odoo_filter_url = f"{self.base_url}/Category/Filter"
+        return transformer
+
+    def convert(self, transformer: ImageModelTransformer,
+                category: Any) -> Any:
+        data = transformer.transform_json_string(
+            json.dumps({'item': {'category': category}}))
+        return data['item']['category']
+
+    def test_converts_known_category(self) -> None:
+        transformer = self.make_transformer()
+        self.assertEqual(self.convert(transformer, '7'), '501')
+        self.assertEqual(self.convert(transformer, 7), 501)
+
+    def test_leading_zeros_match_wordpress_id(self) -> None:
+        self.assertEqual(self.convert(self.make_transformer(), '007'), '501')
+
+    def test_non_ascii_digits_kept(self) -> None:
+        self.assertEqual(self.convert(self.make_transformer(), '²'), '²')
+
+    def test_no_odoo_match_uses_placeholder(self) -> None:
+        self.assertEqual(self.convert(self.make_transformer(), '8'),
+                         ImageModelTransformer.PLACEHOLDER_CATEGORY_ID)
+
+    def test_unknown_category_kept(self) -> None:
+        self.assertEqual(self.convert(self.make_transformer(), '9'), '9')
+
+
+class PersistentCategoryCacheTest(CategoryConversionTest):
+    """What resolve writes to the on-disk category cache, and for how long."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        patcher = mock.patch.object(ImageModelTransformer, 'CACHE_DIR',
+                                    cache_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache_dir = cache_dir.name
+
+    def make_transformer(self, **kwargs: Any) -> ImageModelTransformer:
+        return super().make_transformer(persistent_cache=True, **kwargs)
+
+    def stored(self, category_id: str) -> Tuple[Optional[str],
+                                                 Optional[float]]:
+        with diskcache.Cache(os.path.join(self.cache_dir,
+                                          'categories')) as store:
+            value, expire_time = store.get(category_id, expire_time=True)
+        return value, expire_time
+
+    def assert_stored(self, category_id: str, value: str,
+                      expire: int) -> None:
+        stored_value, expire_time = self.stored(category_id)
+        self.assertEqual(stored_value, value)
+        assert expire_time is not None
+        self.assertAlmostEqual(expire_time, time.time() + expire, delta=60)
+
+    def test_match_stored_for_a_day(self) -> None:
+        self.convert(self.make_transformer(), '7')
+        self.assert_stored('7', '501',
+                           ImageModelTransformer.CATEGORY_CACHE_EXPIRE)
+
+    def test_wordpress_miss_stored_for_an_hour(self) -> None:
+        self.convert(self.make_transformer(), '9')
+        self.assert_stored('9', '9',
+                           ImageModelTransformer.NEGATIVE_CACHE_EXPIRE)
+
+    def test_odoo_miss_stored_for_an_hour(self) -> None:
+        self.convert(self.make_transformer(), '8')
+        self.assert_stored('8', ImageModelTransformer.PLACEHOLDER_CATEGORY_ID,
+                           ImageModelTransformer.NEGATIVE_CACHE_EXPIRE)
+
+    def test_wordpress_outage_stores_nothing(self) -> None:
+        self.handler.wordpress_status = 503
+        self.assertEqual(self.convert(self.make_transformer(), '7'), '7')
+        self.assertEqual(self.stored('7'), (None, None))
+
+    def test_odoo_outage_stores_nothing(self) -> None:
+        self.handler.odoo_status = 503
+        self.assertEqual(self.convert(self.make_transformer(), '7'),
+                         ImageModelTransformer.PLACEHOLDER_CATEGORY_ID)
+        self.assertEqual(self.stored('7'), (None, None))
+
+    def test_stored_result_skips_network(self) -> None:
+        self.convert(self.make_transformer(), '9')
+        del self.handler.requests[:]
+        self.assertEqual(self.convert(self.make_transformer(), '9'), '9')
+        self.assertEqual(self.handler.requests, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
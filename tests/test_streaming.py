@@ -0,0 +1,91 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transform_images import ImageModelTransformer, _dumps_json
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class OfflineTransformer(ImageModelTransformer):
+    # Small batches so items are split across several of them
+    STREAM_BATCH_SIZE = 2
+
+
+class StreamingOutputTest(unittest.TestCase):
+    """The streaming path must write exactly what the in-memory path does."""
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def make_transformer(self) -> ImageModelTransformer:
+        transformer = OfflineTransformer(fetch_dimensions=False,
+                                         convert_category_ids=False)
+        self.addCleanup(transformer.close)
+        return transformer
+
+    def assert_same_output(self, input_file: str) -> None:
+        output_file = os.path.join(self.tmp_dir.name, 'out.json')
+        for indent in (2, 4):
+            with self.subTest(input_file=input_file, indent=indent):
+                expected = _dumps_json(
+                    self.make_transformer().transform_json_file(input_file),
+                    indent)
+                self.make_transformer().transform_json_file_streaming(
+                    input_file, output_file, indent)
+                with open(output_file, 'rb') as f:
+                    self.assertEqual(f.read(), expected)
+
+    def test_bundled_configs(self) -> None:
+        for name in ('app_config.json', 'test_config.json',
+                     'ems_app_config.json', 'app_config_ems_img.json'):
+            self.assert_same_output(os.path.join(REPO_DIR, name))
+
+    def test_large_integers(self) -> None:
+        # Beyond the signed and the unsigned 64-bit range respectively
+        document = {
+            'homeConfig': {
+                'homeSections': [{
+                    'y': 12345678901234567890,
+                    'id': 123456789012345678901234567890,
+                    'image': 'https://example.com/a.png'
+                }],
+                'n': -1
+            }
+        }
+        expected = {
+            'homeConfig': {
+                'homeSections': [{
+                    'y': 12345678901234567890,
+                    'id': 123456789012345678901234567890,
+                    'image': {
+                        'imageUrl': 'https://example.com/a.png'
+                    }
+                }],
+                'n': -1
+            }
+        }
+        input_file = os.path.join(self.tmp_dir.name, 'big.json')
+        with open(input_file, 'w', encoding='utf-8') as f:
+            json.dump(document, f)
+        output_file = os.path.join(self.tmp_dir.name, 'out.json')
+
+        for indent in (2, 4):
+            with self.subTest(indent=indent):
+                in_memory = _dumps_json(
+                    self.make_transformer().transform_json_file(input_file),
+                    indent)
+                self.assertEqual(json.loads(in_memory), expected)
+
+                self.make_transformer().transform_json_file_streaming(
+                    input_file, output_file, indent)
+                with open(output_file, 'rb') as f:
+                    self.assertEqual(json.loads(f.read()), expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import sys
+import unittest
+from typing import Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transform_images import ImageModelTransformer
+
+CLOUDINARY = 'https://res.cloudinary.com/demo/image/upload'
+# Nothing listens on the discard port, so a fetch fails straight away
+UNREACHABLE = 'http://127.0.0.1:9/wp-content/uploads'
+
+
+class UrlDimensionsTest(unittest.TestCase):
+
+    def make_transformer(self, **kwargs: Any) -> ImageModelTransformer:
+        transformer = ImageModelTransformer(convert_category_ids=False,
+                                            **kwargs)
+        self.addCleanup(transformer.close)
+        return transformer
+
+    def assert_dimensions(self, url: str, expected: Any) -> None:
+        with self.subTest(url=url):
+            self.assertEqual(
+                self.make_transformer()._dimensions_from_url(url), expected)
+
+    def test_cloudinary_exact_size(self) -> None:
+        self.assert_dimensions(f'{CLOUDINARY}/w_800,h_600/v1/sample.jpg',
+                               (800, 600))
+        self.assert_dimensions(f'{CLOUDINARY}/c_fill,w_800,h_600/sample.jpg',
+                               (800, 600))
+        self.assert_dimensions(
+            f'{CLOUDINARY}/w_800,h_600,c_thumb,g_face/sample.jpg', (800, 600))
+
+    def test_cloudinary_aspect_preserving_crops(self) -> None:
+        self.assert_dimensions(f'{CLOUDINARY}/w_800,h_600,c_fit/sample.jpg',
+                               None)
+        self.assert_dimensions(f'{CLOUDINARY}/c_limit,w_800,h_600/sample.jpg',
+                               None)
+        self.assert_dimensions(f'{CLOUDINARY}/w_800,h_600,dpr_2/sample.jpg',
+                               None)
+
+    def test_cloudinary_chained_transformations(self) -> None:
+        self.assert_dimensions(
+            f'{CLOUDINARY}/c_fill,w_800,h_600/e_sharpen/sample.jpg',
+            (800, 600))
+        self.assert_dimensions(
+            f'{CLOUDINARY}/c_fill,w_800,h_600/w_400/sample.jpg', None)
+
+    def test_cloudinary_partial_size(self) -> None:
+        self.assert_dimensions(f'{CLOUDINARY}/w_800/sample.jpg', None)
+        self.assert_dimensions(f'{CLOUDINARY}/w_0.5,h_0.5/sample.jpg', None)
+
+    def test_resize_suffix(self) -> None:
+        self.assert_dimensions(
+            'https://example.com/uploads/photo-1024x768.jpg', (1024, 768))
+        self.assert_dimensions(
+            'https://example.com/uploads/photo-1024x768.jpg?v=2', (1024, 768))
+        self.assert_dimensions(
+            'https://example.com/uploads/photo-1024x768-copy.jpg', None)
+        self.assert_dimensions('https://example.com/uploads/photo.jpg', None)
+
+    def test_url_size_skips_fetch(self) -> None:
+        transformer = self.make_transformer()
+        self.assertEqual(
+            transformer.get_image_dimensions(f'{UNREACHABLE}/a-300x200.png'),
+            (300, 200))
+
+    def test_strict_dimensions_ignores_url(self) -> None:
+        transformer = self.make_transformer(strict_dimensions=True)
+        url = f'{UNREACHABLE}/a-300x200.png'
+        self.assertIsNone(transformer._dimensions_from_url(url))
+        self.assertIsNone(
+            transformer._dimensions_from_url(f'{CLOUDINARY}/w_8,h_6/a.jpg'))
+        self.assertEqual(transformer.get_image_dimensions(url), (None, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,44 +3,244 @@
 
 import json
 import argparse
+import asyncio
+import cachetools
+import concurrent.futures
+import importlib
 import os
-import copy
-import requests
+import re
+import sqlite3
+import diskcache  # type: ignore[import-untyped]
+import httpx
+import ijson  # type: ignore[import-untyped]
+import orjson
 import io
 import urllib.parse
 import time
-from PIL import Image
-from typing import Any, Dict, List, Union, Tuple, Optional
+from collections import deque
+from PIL import Image, ImageFile
+from typing import (Any, ClassVar, Coroutine, Deque, Dict, FrozenSet,
+                    Iterator, List, Pattern, Set, TextIO, TypeVar, Union,
+                    Tuple, Optional)
+
+_T = TypeVar('_T')
+
+
+# Worklist marker: run collect_main_category_items on a finished components list
+_COLLECT_MAIN_CATEGORIES = object()
+
+
+def _arg_key(self: Any, arg: str) -> str:
+    # cachedmethod key: the argument itself, so the caches stay plain dicts
+    # that the prefetch passes can fill directly
+    return arg
+
+
+def _run_sync(coroutine: Coroutine[Any, Any, _T]) -> _T:
+    # asyncio.run cannot nest inside a running event loop, so callers that
+    # are themselves async get the coroutine run on a worker thread instead
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+def _dumps_json(value: Any, indent: int, non_finite: bool = False) -> bytes:
+    # orjson encodes in C but only supports a two-space indent, only
+    # integers that fit in 64 bits, and writes NaN/Infinity as null
+    if indent == 2 and not non_finite:
+        try:
+            return orjson.dumps(value,
+                                option=orjson.OPT_INDENT_2
+                                | orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(value, ensure_ascii=False,
+                      indent=indent).encode('utf-8')
+
+
+# How values under a given key are treated, see _classify_key
+_PLAIN_KEY = 0
+_CATEGORY_KEY = 1
+_IMAGE_KEY = 2
 
 
 class ImageModelTransformer:
 
-    IMAGE_FIELDS = {
+    IMAGE_FIELDS: ClassVar[Set[str]] = {
         'image', 'small_img', 'slider_images', 'homeTabBarBackgroundImage',
         'sectionTabBackgroundImage', 'sectionBackgrondImg', 'influencer_pfp',
         'backgroundImage', 'banner_image', 'profile_image', 'thumbnail',
         'cover_image', 'logo', 'icon'
     }
 
+    # Lowercased copy for case-insensitive key matching
+    IMAGE_FIELDS_LC: ClassVar[FrozenSet[str]] = frozenset(
+        map(str.lower, IMAGE_FIELDS))
+
+    IMAGE_EXTENSIONS: ClassVar[Tuple[str, ...]] = ('.jpg', '.jpeg', '.png',
+                                                   '.gif', '.bmp', '.webp',
+                                                   '.svg')
+
+    # Known image hosts/paths, matched anywhere in the value
+    IMAGE_URL_RE: ClassVar[Pattern[str]] = re.compile(
+        r'cdn\.digitaloceanspaces\.com|amazonaws\.com|cloudinary\.com'
+        r'|imgur\.com|unsplash\.com|/images/|/img/|/media/|/assets/',
+        re.IGNORECASE)
+
+    # Distinct strings remembered by is_image_url before starting over, keeps
+    # streamed runs from growing the memo without limit
+    IMAGE_URL_MEMO_SIZE: ClassVar[int] = 65536
+
+    # Sizes spelled out in image URLs: WordPress style "-1024x768.jpg"
+    # resize suffixes
+    URL_DIMENSIONS_RES: ClassVar[Tuple[Pattern[str], ...]] = (
+        re.compile(r'[-_/](\d{2,4})[xX](\d{2,4})(?:\.[a-zA-Z]+)?(?:$|\?)'),
+    )
+    # Cloudinary transformation path segments such as "c_fill,w_800,h_600".
+    # Only crop modes that output exactly w x h are trusted; c_fit, c_limit
+    # and friends keep the aspect ratio, and dpr/ar/z rescale the result.
+    CLOUDINARY_TRANSFORM_RE: ClassVar[Pattern[str]] = re.compile(
+        r'/((?:[a-z]{1,3}_[^,/]+,)*[a-z]{1,3}_[^,/]+)(?=/)')
+    CLOUDINARY_SIZE_PARAMS: ClassVar[FrozenSet[str]] = frozenset(
+        ('w', 'h', 'c', 'dpr', 'ar', 'z'))
+    CLOUDINARY_EXACT_CROPS: ClassVar[FrozenSet[str]] = frozenset(
+        ('scale', 'fill', 'crop', 'pad', 'thumb'))
+
+    HTTP_HEADERS: ClassVar[Dict[str, str]] = {
+        'User-Agent':
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    }
+
+    WP_CREDENTIALS: ClassVar[Dict[str, str]] = {
+        "consumer_key": "ck_7f162b671db8061d5e0ba7de15f865aebf9e13c3",
+        "consumer_secret": "cs_a65c0e2c7771f9a64a317873754779ce964c3172"
+    }
+
+    # WordPress caps per_page at 100 for the categories endpoint
+    WP_BATCH_SIZE: ClassVar[int] = 100
+
+    # Upper bound on simultaneous requests during prefetch
+    MAX_CONCURRENT_FETCHES: ClassVar[int] = 32
+    MAX_CONCURRENT_LOOKUPS: ClassVar[int] = 16
+
+    # Content types never worth reading; anything else is tried, since
+    # storage buckets often serve images as application/octet-stream or
+    # binary/octet-stream
+    NON_IMAGE_CONTENT_TYPES: ClassVar[Tuple[str, ...]] = (
+        'video/', 'audio/', 'text/')
+    # Bodies outside this size range are empty, truncated or not images
+    MIN_IMAGE_BYTES: ClassVar[int] = 16
+    MAX_IMAGE_BYTES: ClassVar[int] = 50 * 1024 * 1024
+
+    # Bytes read per step while waiting for an image header to parse
+    HEADER_CHUNK_SIZE: ClassVar[int] = 2048
+
+    # On-disk cache shared between runs, entries expire after 30 days
+    CACHE_DIR: ClassVar[str] = os.path.expanduser("~/.cache/mataaa-transform")
+    CACHE_EXPIRE: ClassVar[int] = 86400 * 30
+
+    # Category mappings change more often; misses are rechecked after an hour
+    CATEGORY_CACHE_EXPIRE: ClassVar[int] = 86400
+    NEGATIVE_CACHE_EXPIRE: ClassVar[int] = 3600
+
+    # Used for WordPress categories that have no Odoo counterpart
+    PLACEHOLDER_CATEGORY_ID: ClassVar[str] = "1139"
+
+    # Inputs at least this large are streamed with ijson instead of loaded
+    # whole; items of the array at STREAM_PREFIX are transformed in batches
+    STREAM_THRESHOLD: ClassVar[int] = 50 * 1024 * 1024
+    STREAM_PREFIX: ClassVar[str] = 'homeConfig.homeSections'
+    STREAM_BATCH_SIZE: ClassVar[int] = 64
+
     def __init__(self,
                  fetch_dimensions: bool = True,
                  cache_dimensions: bool = True,
-                 convert_category_ids: bool = True):
+                 convert_category_ids: bool = True,
+                 persistent_cache: bool = False,
+                 strict_dimensions: bool = False) -> None:
       
         self.fetch_dimensions = fetch_dimensions
+        # Always measure images instead of trusting sizes found in URLs
+        self.strict_dimensions = strict_dimensions
         self.cache_dimensions = cache_dimensions
         self.convert_category_ids = convert_category_ids
         self.dimension_cache: Dict[str, Tuple[
             Optional[int], Optional[int]]] = {} if cache_dimensions else {}
         self.category_cache: Dict[str, str] = {}
+        # WordPress id -> name and Odoo name -> mattaId lookups, None if missing
+        self.category_cache_wp: Dict[str, Optional[str]] = {}
+        self.odoo_id_cache: Dict[str, Optional[str]] = {}
+        # ('wp', id) / ('odoo', name) lookups that errored rather than missed
+        self._failed_lookups: Set[Tuple[str, str]] = set()
         self.wordpress_base_url = "https://www.mataaa.com"
         self.odoo_filter_url = "https://staging.mataaa.com/gateway/CatalogManagement/api/v1/Category/Filter"
         # Store main category items during transformation
-        self.main_category_items = []
+        self.main_category_items: List[Dict[str, Any]] = []
+        # Memoized _classify_key results, keys repeat heavily in configs
+        self._key_actions: Dict[str, int] = {}
+        # Memoized is_image_url results, bounded by IMAGE_URL_MEMO_SIZE
+        self._image_url_flags: Dict[str, bool] = {}
+        # Set once parsed input contained NaN or Infinity, see _dumps_json
+        self.non_finite_floats = False
+        # Shared HTTP/2 client so API calls reuse one connection per host
+        self._client = httpx.Client(
+            http2=True,
+            timeout=10,
+            headers=self.HTTP_HEADERS,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_keepalive_connections=self.MAX_CONCURRENT_FETCHES))
+        # Disk-backed second level behind the in-memory caches above, opened
+        # on first use by _open_store; None once opening has been given up
+        self.persistent_cache = persistent_cache
+        self._stores: Dict[str, Optional[diskcache.Cache]] = {}
+
+    def close(self) -> None:
+        self._client.close()
+        for store in self._stores.values():
+            if store is not None:
+                store.close()
+
+    def _open_store(self, name: str) -> Optional[diskcache.Cache]:
+
+        if name in self._stores:
+            return self._stores[name]
+
+        store = None
+        try:
+            store = diskcache.Cache(os.path.join(self.CACHE_DIR, name))
+        except (OSError, sqlite3.Error) as e:
+            print(f"Warning: Could not open cache {name} in {self.CACHE_DIR}, "
+                  f"caching in memory only: {e}")
+
+        self._stores[name] = store
+        return store
+
+    def _dimension_store(self) -> Optional[diskcache.Cache]:
+
+        if not (self.persistent_cache and self.fetch_dimensions
+                and self.cache_dimensions):
+            return None
+        return self._open_store("dims")
+
+    def _category_store(self) -> Optional[diskcache.Cache]:
+
+        if not (self.persistent_cache and self.convert_category_ids):
+            return None
+        return self._open_store("categories")
+
+    def __enter__(self) -> 'ImageModelTransformer':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
 
     def collect_main_category_items(self, components: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
 
-        main_category_items = []
+        main_category_items: List[Dict[str, Any]] = []
         components_to_remove = []
 
         for i, component in enumerate(components):
@@ -78,68 +278,228 @@ class ImageModelTransformer:
         if not isinstance(value, str):
             return False
 
+        # Both the prefetch pass and the transform classify every string
+        is_image = self._image_url_flags.get(value)
+        if is_image is None:
+            # endswith takes the whole tuple in one call, cheaper than the regex
+            is_image = (value.lower().endswith(self.IMAGE_EXTENSIONS)
+                        or self.IMAGE_URL_RE.search(value) is not None)
 
-        image_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp',
-                            '.svg')
-
+            if len(self._image_url_flags) >= self.IMAGE_URL_MEMO_SIZE:
+                self._image_url_flags.clear()
+            self._image_url_flags[value] = is_image
 
-        if any(value.lower().endswith(ext) for ext in image_extensions):
-            return True
-
-
-        image_patterns = [
-            'cdn.digitaloceanspaces.com', 'amazonaws.com', 'cloudinary.com',
-            'imgur.com', 'unsplash.com', '/images/', '/img/', '/media/',
-            '/assets/'
-        ]
-
-        return any(pattern in value.lower() for pattern in image_patterns)
+        return is_image
 
+    @cachetools.cachedmethod(lambda self: self.dimension_cache
+                             if self.cache_dimensions else {},
+                             key=_arg_key)
     def get_image_dimensions(
             self, image_url: str) -> Tuple[Optional[int], Optional[int]]:
   
         if not self.fetch_dimensions:
             return None, None
 
-
-        if self.cache_dimensions and image_url in self.dimension_cache:
+        # Covers the URL heuristic and the on-disk cache
+        if self.cache_dimensions and self._load_stored_dimensions(image_url):
             return self.dimension_cache[image_url]
 
-        try:
-            headers = {
-                'User-Agent':
-                'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-
-            print(f"Fetching dimensions for: {image_url}")
+        dimensions = self._dimensions_from_url(image_url)
+        if dimensions is not None:
+            return dimensions
 
+        # Not prefetched (e.g. transform_data called directly), fetch it now
+        return _run_sync(self._fetch_dimensions([image_url]))[0]
 
-            response = requests.get(image_url,
-                                    headers=headers,
-                                    timeout=5,
-                                    stream=True)
-            response.raise_for_status()
+    async def _fetch_one(
+            self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore,
+            image_url: str) -> Tuple[Optional[int], Optional[int]]:
 
-
-            image_data = io.BytesIO(response.content)
-            with Image.open(image_data) as img:
-                width, height = img.size
+        try:
+            # HTTP/2 multiplexes every request over one connection, so the
+            # client's connection limit alone does not bound concurrency
+            async with semaphore, client.stream('GET', image_url) as response:
+                print(f"Fetching dimensions for: {image_url}")
+
+                response.raise_for_status()
+
+                # Headers arrive before the body, so non-images cost no download
+                content_type = response.headers.get('content-type', '')
+                if content_type.lower().startswith(
+                        self.NON_IMAGE_CONTENT_TYPES):
+                    print(f"  → Not an image ({content_type}), skipping")
+                    return None, None
+
+                content_length = response.headers.get('content-length', '')
+                if content_length.isdigit() and not (
+                        self.MIN_IMAGE_BYTES <= int(content_length) <=
+                        self.MAX_IMAGE_BYTES):
+                    print(f"  → Unlikely image size ({content_length} bytes), "
+                          "skipping")
+                    return None, None
+
+                # Stop downloading as soon as the header reveals the size
+                parser = ImageFile.Parser()
+                image_data = io.BytesIO()
+                async for chunk in response.aiter_bytes(
+                        self.HEADER_CHUNK_SIZE):
+                    image_data.write(chunk)
+                    parser.feed(chunk)
+                    if parser.image is not None:
+                        break
+                    # Bodies without a length header are capped here instead
+                    if image_data.tell() > self.MAX_IMAGE_BYTES:
+                        print("  → Too large for an image, skipping")
+                        return None, None
+
+                if parser.image is not None:
+                    width, height = parser.image.size
+
+            if parser.image is None:
+                # Format not detectable from partial data, use the full body
+                image_data.seek(0)
+                with Image.open(image_data) as img:
+                    width, height = img.size
 
             print(f"  → {width}x{height}")
 
-
-            if self.cache_dimensions:
-                self.dimension_cache[image_url] = (width, height)
-
             return width, height
 
         except Exception as e:
             print(f"Warning: Could not fetch dimensions for {image_url}: {e}")
-
-            if self.cache_dimensions:
-                self.dimension_cache[image_url] = (None, None)
             return None, None
 
+    async def _fetch_dimensions(
+            self, image_urls: List[str]
+    ) -> List[Tuple[Optional[int], Optional[int]]]:
+
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_FETCHES)
+        async with httpx.AsyncClient(
+                http2=True,
+                timeout=5,
+                headers=self.HTTP_HEADERS,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.MAX_CONCURRENT_FETCHES)) as client:
+            results = await asyncio.gather(*[
+                self._fetch_one(client, semaphore, url) for url in image_urls
+            ])
+
+        if self.cache_dimensions:
+            store = self._dimension_store()
+            for url, dimensions in zip(image_urls, results):
+                self.dimension_cache[url] = dimensions
+                if store is not None and dimensions[0] is not None:
+                    store.set(url, dimensions, expire=self.CACHE_EXPIRE)
+
+        return results
+
+    def _dimensions_from_url(
+            self, image_url: str) -> Optional[Tuple[int, int]]:
+
+        if self.strict_dimensions:
+            return None
+
+        dimensions = self._cloudinary_dimensions(image_url)
+        if dimensions is not None:
+            return dimensions
+
+        for pattern in self.URL_DIMENSIONS_RES:
+            match = pattern.search(image_url)
+            if match:
+                return int(match.group(1)), int(match.group(2))
+
+        return None
+
+    def _cloudinary_dimensions(
+            self, image_url: str) -> Optional[Tuple[int, int]]:
+
+        # Transformations are chained, the last one touching the size wins
+        params: Dict[str, str] = {}
+        for segment in self.CLOUDINARY_TRANSFORM_RE.findall(image_url):
+            segment_params: Dict[str, str] = {}
+            for param in segment.split(','):
+                name, _, value = param.partition('_')
+                segment_params[name] = value
+            if not self.CLOUDINARY_SIZE_PARAMS.isdisjoint(segment_params):
+                params = segment_params
+
+        width = params.get('w', '')
+        height = params.get('h', '')
+        if not (width.isascii() and width.isdigit() and height.isascii()
+                and height.isdigit()):
+            return None
+        if ('dpr' in params or 'ar' in params or 'z' in params
+                or params.get('c', 'scale') not in self.CLOUDINARY_EXACT_CROPS):
+            return None
+
+        return int(width), int(height)
+
+    def _load_stored_dimensions(self, image_url: str) -> bool:
+
+        if image_url in self.dimension_cache:
+            return True
+
+        dimensions = self._dimensions_from_url(image_url)
+        if dimensions is not None:
+            self.dimension_cache[image_url] = dimensions
+            return True
+
+        store = self._dimension_store()
+        if store is not None:
+            dimensions = store.get(image_url)
+            if dimensions is not None:
+                self.dimension_cache[image_url] = dimensions
+                return True
+
+        return False
+
+    def _iter_dict_items(self, data: Any) -> Iterator[Tuple[str, Any]]:
+
+        # Yields every (key, value) pair of every dict nested inside data
+        stack: List[Any] = [data]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                for key, value in node.items():
+                    yield key, value
+                    if isinstance(value, (dict, list)):
+                        stack.append(value)
+            elif isinstance(node, list):
+                stack.extend(item for item in node
+                             if isinstance(item, (dict, list)))
+
+    def _collect_image_urls(self, data: Any) -> Set[str]:
+
+        urls: Set[str] = set()
+
+        for key, value in self._iter_dict_items(data):
+            if isinstance(value, str):
+                if (self._classify_key(key) == _IMAGE_KEY
+                        or self.is_image_url(value)):
+                    urls.add(value)
+            elif isinstance(value, list):
+                is_image_field = self._classify_key(key) == _IMAGE_KEY
+                for item in value:
+                    if isinstance(item, str) and (is_image_field
+                                                  or self.is_image_url(item)):
+                        urls.add(item)
+
+        return urls
+
+    def prefetch_image_dimensions(self, data: Any) -> None:
+
+        # Without a cache every lookup has to go to the network anyway
+        if not self.fetch_dimensions or not self.cache_dimensions:
+            return
+
+        image_urls = [
+            url for url in self._collect_image_urls(data)
+            if not self._load_stored_dimensions(url)
+        ]
+        if image_urls:
+            _run_sync(self._fetch_dimensions(image_urls))
+
     def create_image_model(self,
                            image_url: str,
                            width: Optional[int] = None,
@@ -161,19 +521,17 @@ class ImageModelTransformer:
 
         return image_model
 
+    @cachetools.cachedmethod(lambda self: self.category_cache_wp,
+                             key=_arg_key)
     def get_wordpress_category_name(self, category_id: str) -> Optional[str]:
 
         try:
             url = f"{self.wordpress_base_url}/wp-json/wc/v2/products/categories"
-            params = {
-                "include": category_id,
-                "consumer_key": "ck_7f162b671db8061d5e0ba7de15f865aebf9e13c3",
-                "consumer_secret":
-                "cs_a65c0e2c7771f9a64a317873754779ce964c3172"
-            }
+            params: Dict[str, Any] = dict(self.WP_CREDENTIALS,
+                                          include=category_id)
 
             print(f"  → Fetching WordPress category: {category_id}")
-            response = requests.get(url, params=params, timeout=10)
+            response = self._client.get(url, params=params)
 
             if response.status_code == 200:
                 data = response.json()
@@ -188,81 +546,255 @@ class ImageModelTransformer:
                 print(
                     f"    ✗ WordPress API error {response.status_code} for category {category_id}"
                 )
+                self._failed_lookups.add(('wp', category_id))
                 return None
 
         except Exception as e:
             print(
                 f"    ✗ Error fetching WordPress category {category_id}: {e}")
+            self._failed_lookups.add(('wp', category_id))
             return None
 
-    def get_odoo_category_id(self, category_name: str) -> Optional[str]:
+    async def _fetch_wordpress_categories(self, client: httpx.AsyncClient,
+                                          semaphore: asyncio.Semaphore,
+                                          category_ids: List[str]) -> None:
 
-        try:
-            encoded_name = urllib.parse.quote(category_name)
-            url = f"{self.odoo_filter_url}?Name={encoded_name}"
+        url = f"{self.wordpress_base_url}/wp-json/wc/v2/products/categories"
+        params: Dict[str, Any] = dict(self.WP_CREDENTIALS,
+                                      include=",".join(category_ids),
+                                      per_page=self.WP_BATCH_SIZE)
 
-            print(f"  → Searching Odoo for: {category_name}")
-            response = requests.get(url, timeout=10)
+        try:
+            async with semaphore:
+                print(f"  → Fetching {len(category_ids)} WordPress categories")
+                response = await client.get(url, params=params)
 
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("status") == "success" and data.get(
-                        "data") and len(data["data"]) > 0:
-                    matta_id = data["data"][0].get("mattaId")
-                    if matta_id:
-                        print(f"    ✓ Found Odoo mattaId: {matta_id}")
-                        return str(matta_id)
-
-                print(f"    ✗ No Odoo category found for: {category_name}")
-                return None
-            else:
+            if response.status_code != 200:
                 print(
-                    f"    ✗ Odoo API error {response.status_code} for category: {category_name}"
+                    f"    ✗ WordPress API error {response.status_code} for categories {params['include']}"
                 )
-                return None
+                return
+
+            names = {
+                str(category.get("id")): category.get("name", "")
+                for category in response.json()
+            }
+
+        except Exception as e:
+            print(f"    ✗ Error fetching WordPress categories: {e}")
+            return
+
+        # Ids missing from a successful response do not exist in WordPress.
+        # WordPress answers "007" with id 7, so match on the numeric value.
+        for category_id in category_ids:
+            self.category_cache_wp[category_id] = names.get(
+                str(int(category_id)))
+
+        print(f"    ✓ Found {len(names)} of {len(category_ids)} categories")
+
+    def _odoo_search_url(self, category_name: str) -> str:
+        encoded_name = urllib.parse.quote(category_name)
+        return f"{self.odoo_filter_url}?Name={encoded_name}"
+
+    def _parse_odoo_response(self, category_name: str,
+                             response: httpx.Response) -> Optional[str]:
+
+        if response.status_code == 200:
+            data = response.json()
+            if data.get("status") == "success" and data.get(
+                    "data") and len(data["data"]) > 0:
+                matta_id = data["data"][0].get("mattaId")
+                if matta_id:
+                    print(f"    ✓ Found Odoo mattaId: {matta_id}")
+                    return str(matta_id)
+
+            print(f"    ✗ No Odoo category found for: {category_name}")
+            return None
+        else:
+            print(
+                f"    ✗ Odoo API error {response.status_code} for category: {category_name}"
+            )
+            return None
+
+    @cachetools.cachedmethod(lambda self: self.odoo_id_cache, key=_arg_key)
+    def get_odoo_category_id(self, category_name: str) -> Optional[str]:
+
+        try:
+            print(f"  → Searching Odoo for: {category_name}")
+            response = self._client.get(self._odoo_search_url(category_name))
+            if response.status_code != 200:
+                self._failed_lookups.add(('odoo', category_name))
+            return self._parse_odoo_response(category_name, response)
 
         except Exception as e:
             print(f"    ✗ Error searching Odoo category {category_name}: {e}")
+            self._failed_lookups.add(('odoo', category_name))
             return None
 
+    async def _fetch_odoo_id(self, client: httpx.AsyncClient,
+                             semaphore: asyncio.Semaphore,
+                             category_name: str) -> None:
+
+        try:
+            async with semaphore:
+                print(f"  → Searching Odoo for: {category_name}")
+                response = await client.get(
+                    self._odoo_search_url(category_name))
+            odoo_id = self._parse_odoo_response(category_name, response)
+
+            # Only definitive answers are cached, errors are retried later
+            if response.status_code == 200:
+                self.odoo_id_cache[category_name] = odoo_id
+
+        except Exception as e:
+            print(f"    ✗ Error searching Odoo category {category_name}: {e}")
+
+    async def _resolve_categories(self, client: httpx.AsyncClient,
+                                  semaphore: asyncio.Semaphore,
+                                  category_ids: List[str],
+                                  requested_names: Set[str]) -> None:
+
+        await self._fetch_wordpress_categories(client, semaphore,
+                                               category_ids)
+
+        category_names: List[str] = []
+        for category_id in category_ids:
+            name = self.category_cache_wp.get(category_id)
+            if (name is not None and name not in self.odoo_id_cache
+                    and name not in requested_names):
+                requested_names.add(name)
+                category_names.append(name)
+
+        await asyncio.gather(*[
+            self._fetch_odoo_id(client, semaphore, name)
+            for name in category_names
+        ])
+
+    async def _convert_all(self, category_ids: List[str]) -> None:
+
+        # Each WordPress batch feeds its Odoo lookups as soon as it returns,
+        # with all requests sharing one concurrency limit
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_LOOKUPS)
+        requested_names: Set[str] = set()
+
+        async with httpx.AsyncClient(
+                http2=True,
+                timeout=10,
+                headers=self.HTTP_HEADERS,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.MAX_CONCURRENT_LOOKUPS)) as client:
+            await asyncio.gather(*[
+                self._resolve_categories(
+                    client, semaphore,
+                    category_ids[start:start + self.WP_BATCH_SIZE],
+                    requested_names)
+                for start in range(0, len(category_ids), self.WP_BATCH_SIZE)
+            ])
+
+    def _collect_category_ids(self, data: Any) -> Set[str]:
+
+        ids: Set[str] = set()
+
+        for key, value in self._iter_dict_items(data):
+            if self._classify_key(key) == _CATEGORY_KEY and isinstance(
+                    value, (str, int)):
+                if str(value).isdigit():
+                    ids.add(str(value))
+
+        return ids
+
+    def prefetch_categories(self, data: Any) -> None:
+
+        if not self.convert_category_ids:
+            return
+
+        # Only ASCII digits are batched; other str.isdigit() ids such as
+        # "²" are left to the single-id lookup in resolve, as before
+        category_ids = sorted(
+            category_id for category_id in self._collect_category_ids(data)
+            if category_id.isascii()
+            and not self._load_stored_category(category_id)
+            and category_id not in self.category_cache_wp)
+        if category_ids:
+            _run_sync(self._convert_all(category_ids))
+
     def convert_category_id(self, category_id: str) -> str:
 
         if not self.convert_category_ids:
             return category_id
 
-
-        if category_id in self.category_cache:
+        if self._load_stored_category(category_id):
             return self.category_cache[category_id]
 
+        return self.resolve(category_id)
 
+    def resolve(self, category_id: str) -> str:
+
+        # WordPress id -> name -> Odoo mattaId, stored as one cache entry.
+        # Misses keep the id (unknown to WordPress) or use the placeholder
+        # (no Odoo match) and expire sooner; failed requests are not stored.
         category_name = self.get_wordpress_category_name(category_id)
 
         if category_name is None:
-
             print(
                 f"  → Category {category_id} not found in WordPress, keeping as-is"
             )
-            self.category_cache[category_id] = category_id
-            return category_id
+            resolved_id = category_id
+            expire = self.NEGATIVE_CACHE_EXPIRE
+            failed = ('wp', category_id) in self._failed_lookups
+        else:
+            odoo_id = self.get_odoo_category_id(category_name)
 
+            if odoo_id is None:
+                print(f"  → Using placeholder for category: {category_name}")
+                resolved_id = self.PLACEHOLDER_CATEGORY_ID
+                expire = self.NEGATIVE_CACHE_EXPIRE
+                failed = ('odoo', category_name) in self._failed_lookups
+            else:
+                resolved_id = odoo_id
+                expire = self.CATEGORY_CACHE_EXPIRE
+                failed = False
 
-        odoo_id = self.get_odoo_category_id(category_name)
+        self.category_cache[category_id] = resolved_id
+        store = self._category_store()
+        if store is not None and not failed:
+            store.set(category_id, resolved_id, expire=expire)
+        return resolved_id
 
-        if odoo_id is None:
+    def _load_stored_category(self, category_id: str) -> bool:
 
-            print(f"  → Using placeholder for category: {category_name}")
-            placeholder_id = "1139"
-            self.category_cache[category_id] = placeholder_id
-            return placeholder_id
+        if category_id in self.category_cache:
+            return True
 
+        store = self._category_store()
+        if store is not None:
+            odoo_id = store.get(category_id)
+            if odoo_id is not None:
+                self.category_cache[category_id] = odoo_id
+                return True
 
-        self.category_cache[category_id] = odoo_id
-        return odoo_id
+        return False
+
+    def _classify_key(self, key: str) -> int:
+
+        action = self._key_actions.get(key)
+        if action is None:
+            key_lower = key.lower()
+            if key_lower in ['category', 'categoryid']:
+                action = _CATEGORY_KEY
+            elif key_lower in self.IMAGE_FIELDS_LC:
+                action = _IMAGE_KEY
+            else:
+                action = _PLAIN_KEY
+            self._key_actions[key] = action
+        return action
 
     def transform_value(self, key: str, value: Any) -> Any:
 
+        action = self._classify_key(key)
 
-        if key.lower() in ['category', 'categoryid'] and isinstance(
+        if action == _CATEGORY_KEY and isinstance(
                 value, (str, int)):
             category_str = str(value)
             if category_str.isdigit():
@@ -278,17 +810,16 @@ class ImageModelTransformer:
 
         if isinstance(value, str):
 
-            if key.lower() in [field.lower() for field in self.IMAGE_FIELDS
-                               ] or self.is_image_url(value):
+            if action == _IMAGE_KEY or self.is_image_url(value):
                 return self.create_image_model(value)
 
 
         elif isinstance(value, list):
-            transformed_list = []
+            is_image_field = action == _IMAGE_KEY
+            transformed_list: List[Any] = []
             for item in value:
-                if isinstance(item, str) and (key.lower() in [
-                        field.lower() for field in self.IMAGE_FIELDS
-                ] or self.is_image_url(item)):
+                if isinstance(item, str) and (is_image_field
+                                              or self.is_image_url(item)):
                     transformed_list.append(self.create_image_model(item))
                 else:
 
@@ -303,22 +834,67 @@ class ImageModelTransformer:
         return value
 
     def transform_data(self, data: Any) -> Any:
-        if isinstance(data, dict):
-            transformed = {}
-            for key, value in data.items():
-
-                if key == 'components' and isinstance(value, list):
-                    transformed[key] = self.collect_main_category_items(
-                        [self.transform_data(item) for item in value]
-                    )
-                else:
-                    transformed[key] = self.transform_value(key, value)
-            return transformed
-        elif isinstance(data, list):
-            return [self.transform_data(item) for item in data]
-        else:
+
+        if not isinstance(data, (dict, list)):
             return data
 
+        # Explicit worklist instead of recursion: each entry is a source node
+        # plus the container and slot its transformed copy is written to.
+        result: List[Any] = [None]
+        work: Deque[Tuple[Any, Any, Any]] = deque([(data, result, 0)])
+
+        while work:
+            node, target, slot = work.pop()
+
+            if node is _COLLECT_MAIN_CATEGORIES:
+                # Pushed before the components, so they are all done by now
+                target[slot] = self.collect_main_category_items(target[slot])
+
+            elif isinstance(node, dict):
+                transformed: Dict[str, Any] = {}
+                target[slot] = transformed
+                for key, value in node.items():
+
+                    if isinstance(value, dict):
+                        transformed[key] = None
+                        work.append((value, transformed, key))
+                    elif isinstance(value, list):
+                        if key == 'components':
+                            work.append(
+                                (_COLLECT_MAIN_CATEGORIES, transformed, key))
+                            transformed[key] = self._transform_items(
+                                value, None, work)
+                        else:
+                            transformed[key] = self._transform_items(
+                                value, key, work)
+                    else:
+                        transformed[key] = self.transform_value(key, value)
+
+            else:
+                target[slot] = self._transform_items(node, None, work)
+
+        return result[0]
+
+    def _transform_items(self, items: List[Any], key: Optional[str],
+                         work: Deque[Tuple[Any, Any, Any]]) -> List[Any]:
+
+        # Strings are only converted in lists held directly under a key,
+        # nested containers are queued on work and filled in later
+        is_image_field = (key is not None
+                          and self._classify_key(key) == _IMAGE_KEY)
+        transformed_list: List[Any] = []
+        for item in items:
+            if isinstance(item, (dict, list)):
+                transformed_list.append(None)
+                work.append(
+                    (item, transformed_list, len(transformed_list) - 1))
+            elif key is not None and isinstance(item, str) and (
+                    is_image_field or self.is_image_url(item)):
+                transformed_list.append(self.create_image_model(item))
+            else:
+                transformed_list.append(item)
+        return transformed_list
+
     def transform_json_file(self, input_file: str) -> Dict[str, Any]:
 
         if not os.path.exists(input_file):
@@ -326,33 +902,185 @@ class ImageModelTransformer:
 
         try:
             with open(input_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+                data = json.load(f, parse_constant=self._parse_constant)
         except json.JSONDecodeError as e:
             raise json.JSONDecodeError(
                 f"Malformed JSON in '{input_file}': {e}", e.doc, e.pos)
 
 
-        data_copy = copy.deepcopy(data)
+        # transform_data builds a new tree, so the parsed input needs no copy
+        self.prefetch_categories(data)
+        self.prefetch_image_dimensions(data)
 
+        return self.transform_data(data)
 
-        return self.transform_data(data_copy)
+    def _parse_constant(self, name: str) -> float:
+        # json only calls this for NaN, Infinity and -Infinity
+        self.non_finite_floats = True
+        return float(name)
 
     def transform_json_string(self, json_string: str) -> Dict[str, Any]:
         
         try:
-            data = json.loads(json_string)
+            data = json.loads(json_string,
+                              parse_constant=self._parse_constant)
         except json.JSONDecodeError as e:
             raise json.JSONDecodeError(f"Malformed JSON string: {e}", e.doc,
                                        e.pos)
 
 
-        data_copy = copy.deepcopy(data)
+        # transform_data builds a new tree, so the parsed input needs no copy
+        self.prefetch_categories(data)
+        self.prefetch_image_dimensions(data)
 
+        return self.transform_data(data)
 
-        return self.transform_data(data_copy)
 
+    def transform_json_file_streaming(self,
+                                      input_file: str,
+                                      output_file: str,
+                                      indent: int = 2) -> None:
 
-def main():
+        if not os.path.exists(input_file):
+            raise FileNotFoundError(f"Input file '{input_file}' not found")
+
+        # Write next to the target and swap in, so errors leave no partial file
+        temp_file = f"{output_file}.tmp"
+        try:
+            try:
+                self._stream_file(ijson, input_file, temp_file, indent)
+            except ijson.JSONError as e:
+                if 'integer overflow' not in str(e):
+                    raise
+                # The yajl2 backends stop at 64-bit integers, which json and
+                # the pure-Python backend accept; redo the parse with the
+                # latter, lookups made so far are cached in memory
+                print(f"Large integer in '{input_file}', "
+                      "re-parsing with the Python ijson backend")
+                self._stream_file(ijson.get_backend('python'), input_file,
+                                  temp_file, indent)
+            os.replace(temp_file, output_file)
+        except ijson.JSONError as e:
+            raise json.JSONDecodeError(
+                f"Malformed JSON in '{input_file}': {e}", "", 0)
+        finally:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+
+    def _stream_file(self, backend: Any, input_file: str, temp_file: str,
+                     indent: int) -> None:
+
+        with open(input_file, 'rb') as src, open(temp_file,
+                                                 'w',
+                                                 encoding='utf-8') as dst:
+            events = backend.parse(src, use_float=True)
+            self._stream_value(events, next(events), None, 0, dst, indent)
+
+    def _stream_value(self, events: Iterator[Tuple[str, str, Any]],
+                      current: Tuple[str, str, Any], key: Optional[str],
+                      depth: int, dst: TextIO, indent: int) -> None:
+
+        path, event, _ = current
+
+        if event == 'start_map' and (
+                path == '' or self.STREAM_PREFIX.startswith(path + '.')):
+            self._stream_map(events, depth, dst, indent)
+        elif event == 'start_array' and path == self.STREAM_PREFIX:
+            self._stream_array(events, key, depth, dst, indent)
+        else:
+            transformed = self._transform_entry(
+                key, self._build_value(events, current))
+            dst.write(self._dump_at_depth(transformed, depth, indent))
+
+    def _stream_map(self, events: Iterator[Tuple[str, str, Any]], depth: int,
+                    dst: TextIO, indent: int) -> None:
+
+        dst.write('{')
+        first = True
+        for _, event, key in events:
+            if event == 'end_map':
+                break
+
+            dst.write(('' if first else ',') + '\n' + ' ' * indent *
+                      (depth + 1) + json.dumps(key, ensure_ascii=False) +
+                      ': ')
+            first = False
+            self._stream_value(events, next(events), key, depth + 1, dst,
+                               indent)
+
+        if not first:
+            dst.write('\n' + ' ' * indent * depth)
+        dst.write('}')
+
+    def _stream_array(self, events: Iterator[Tuple[str, str, Any]],
+                      key: Optional[str], depth: int, dst: TextIO,
+                      indent: int) -> None:
+
+        dst.write('[')
+        first = True
+        batch: List[Any] = []
+        for current in events:
+            if current[1] == 'end_array':
+                break
+
+            batch.append(self._build_value(events, current))
+            if len(batch) >= self.STREAM_BATCH_SIZE:
+                first = self._write_batch(key, batch, depth, dst, indent,
+                                          first)
+                batch = []
+
+        first = self._write_batch(key, batch, depth, dst, indent, first)
+
+        if not first:
+            dst.write('\n' + ' ' * indent * depth)
+        dst.write(']')
+
+    def _write_batch(self, key: Optional[str], batch: List[Any], depth: int,
+                     dst: TextIO, indent: int, first: bool) -> bool:
+
+        for item in self._transform_entry(key, batch):
+            dst.write(('' if first else ',') + '\n' + ' ' * indent *
+                      (depth + 1) +
+                      self._dump_at_depth(item, depth + 1, indent))
+            first = False
+
+        return first
+
+    def _transform_entry(self, key: Optional[str], value: Any) -> Any:
+
+        # Wrapping the value under its key gives it the same treatment it
+        # would get as part of the whole document
+        data = value if key is None else {key: value}
+        self.prefetch_categories(data)
+        self.prefetch_image_dimensions(data)
+        transformed = self.transform_data(data)
+        return transformed if key is None else transformed[key]
+
+    def _build_value(self, events: Iterator[Tuple[str, str, Any]],
+                     current: Tuple[str, str, Any]) -> Any:
+
+        builder = ijson.ObjectBuilder()
+        _, event, value = current
+        builder.event(event, value)
+
+        depth = 1 if event in ('start_map', 'start_array') else 0
+        while depth:
+            _, event, value = next(events)
+            builder.event(event, value)
+            if event in ('start_map', 'start_array'):
+                depth += 1
+            elif event in ('end_map', 'end_array'):
+                depth -= 1
+
+        return builder.value
+
+    def _dump_at_depth(self, value: Any, depth: int, indent: int) -> str:
+        text = _dumps_json(value, indent).decode('utf-8')
+        # JSON strings never contain raw newlines, so this only re-indents
+        return text.replace('\n', '\n' + ' ' * indent * depth)
+
+
+def main() -> int:
 
     parser = argparse.ArgumentParser(
         description=
@@ -371,29 +1099,43 @@ def main():
         '--no-dimensions',
         action='store_true',
         help='Skip fetching image dimensions for faster processing')
+    parser.add_argument(
+        '--no-persistent-cache',
+        action='store_true',
+        help='Do not read or write the on-disk dimension and category cache')
+    parser.add_argument(
+        '--strict-dimensions',
+        action='store_true',
+        help='Always fetch image dimensions, even when the URL encodes them')
 
     args = parser.parse_args()
 
     try:
 
         fetch_dimensions = not args.no_dimensions
-        transformer = ImageModelTransformer(fetch_dimensions=fetch_dimensions,
-                                            convert_category_ids=True)
+        with ImageModelTransformer(
+                fetch_dimensions=fetch_dimensions,
+                convert_category_ids=True,
+                persistent_cache=not args.no_persistent_cache,
+                strict_dimensions=args.strict_dimensions) as transformer:
 
-        if transformer.convert_category_ids:
-            print("Converting WordPress category IDs to Odoo IDs...")
+            if transformer.convert_category_ids:
+                print("Converting WordPress category IDs to Odoo IDs...")
 
-        transformed_data = transformer.transform_json_file(args.input_file)
-
-
-        output_path = args.output or "output.json"
+            output_path = args.output or "output.json"
 
+            if (os.path.exists(args.input_file) and os.path.getsize(
+                    args.input_file) >= transformer.STREAM_THRESHOLD):
+                transformer.transform_json_file_streaming(
+                    args.input_file, output_path, args.indent)
+            else:
+                transformed_data = transformer.transform_json_file(
+                    args.input_file)
 
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(transformed_data,
-                      f,
-                      ensure_ascii=False,
-                      indent=args.indent)
+                with open(output_path, 'wb') as f:
+                    f.write(
+                        _dumps_json(transformed_data, args.indent,
+                                    transformer.non_finite_floats))
 
         print(f"Transformed JSON written to '{output_path}'")
 
@@ -418,5 +1160,35 @@ def main():
     return 0
 
 
+def _built_from(compiled_file: Optional[str], source_file: str) -> bool:
+    # The build's copy of the source sits next to it, see __main__ below
+    if not compiled_file:
+        return False
+    copy_file = os.path.join(os.path.dirname(compiled_file),
+                             '_transform_images_c.py')
+    try:
+        with open(copy_file, 'rb') as copy, open(source_file, 'rb') as source:
+            return copy.read() == source.read()
+    except OSError:
+        return False
+
+
 if __name__ == '__main__':
+    # A mypyc build is compiled from a copy under its own module name, so
+    # importing transform_images always gets this source:
+    #   cp transform_images.py _transform_images_c.py
+    #   mypyc _transform_images_c.py
+    # It is imported dynamically since mypyc cannot compile a module that
+    # imports itself, and only used while built from this exact source.
+    try:
+        compiled = importlib.import_module('_transform_images_c')
+    except ImportError:
+        pass
+    else:
+        if _built_from(compiled.__file__, __file__):
+            print(f"Using compiled build {compiled.__file__}")
+            main = compiled.main
+        else:
+            print(f"Using {__file__}, compiled build {compiled.__file__} "
+                  "is out of date")
     exit(main())